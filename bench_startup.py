@@ -0,0 +1,41 @@
+import statistics
+import subprocess
+import sys
+import time
+
+from cli import COMMANDS
+
+HEAVY = ["pandas", "numpy", "sklearn", "matplotlib", "seaborn", "plotly"]
+
+# Import each subcommand's module in a fresh interpreter and report how long
+# the import took and which heavy libraries it pulled in
+PROBE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def time_command(args, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(repeat=5):
+    print(f"{'subcommand':<12}{'--help (s)':>12}{'import (s)':>12}  heavy modules loaded")
+    for name, (module, _) in COMMANDS.items():
+        help_time = time_command(["cli.py", name, "--help"], repeat)
+        out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+                             check=True, capture_output=True, text=True).stdout.split()
+        loaded = out[1] if len(out) > 1 else "-"
+        print(f"{name:<12}{help_time:>12.3f}{float(out[0]):>12.3f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
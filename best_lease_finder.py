@@ -1,107 +1,142 @@
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
+from norm_stats import NormStats, fingerprint, load_previous, rescore, scheme_for
+from rank_history import RankingHistory, file_digest
 
-# ----------------------------------------
-# 1. Load your cleaned data
-# ----------------------------------------
-df = pd.read_csv("leases_cleaned.csv")
 
 # ----------------------------------------
-# 2. Recompute calculated columns if needed
+# 1. Recompute calculated columns if needed
 # ----------------------------------------
-df["rent_per_sf"] = df["overall_rent"] / df["leasedsf"]
-df["leasing_density"] = df["leasedsf"] / df["rba"]
-df["availability_score"] = 1 - df["availability_proportion"]
+def add_calculated_columns(df):
+    df["rent_per_sf"] = df["overall_rent"] / df["leasedsf"]
+    df["leasing_density"] = df["leasedsf"] / df["rba"]
+    df["availability_score"] = 1 - df["availability_proportion"]
+    return df
 
-# ----------------------------------------
-# 3. Group by city & state (Base Summary)
-# ----------------------------------------
-city_summary = df.groupby(["state", "city"]).agg({
-    "leasedsf": "sum",
-    "rent_per_sf": "mean",
-    "leasing_density": "mean",
-    "availability_score": "mean",
-    "company_name": "count"
-}).reset_index()
-
-# Rename columns for clarity
-city_summary.rename(columns={
-    "leasedsf": "total_leased_sf",
-    "rent_per_sf": "avg_rent_per_sf",
-    "leasing_density": "avg_density",
-    "availability_score": "avg_availability_score",
-    "company_name": "lease_activity"
-}, inplace=True)
-
-# 🆕 STEP 1: Filter out cities with low lease activity
-city_summary = city_summary[city_summary["lease_activity"] >= 5]
 
 # ----------------------------------------
-# 4. Normalize features
+# 2. Group by city & state (Base Summary)
 # ----------------------------------------
-from sklearn.preprocessing import MinMaxScaler
-scaler = MinMaxScaler()
+def summarize(df, keys):
+    summary = df.groupby(keys).agg({
+        "leasedsf": "sum",
+        "rent_per_sf": "mean",
+        "leasing_density": "mean",
+        "availability_score": "mean",
+        "company_name": "count"
+    }).reset_index()
+
+    # Rename columns for clarity
+    summary.rename(columns={
+        "leasedsf": "total_leased_sf",
+        "rent_per_sf": "avg_rent_per_sf",
+        "leasing_density": "avg_density",
+        "availability_score": "avg_availability_score",
+        "company_name": "lease_activity"
+    }, inplace=True)
+    return summary
 
-city_summary[["norm_sf", "norm_rent", "norm_density", "norm_availability", "norm_activity"]] = scaler.fit_transform(
-    city_summary[["total_leased_sf", "avg_rent_per_sf", "avg_density", "avg_availability_score", "lease_activity"]]
-)
 
 # ----------------------------------------
-# 5. Compute lease score
+# 3. Normalize features and compute lease score
 # ----------------------------------------
-city_summary["lease_score"] = (
-    city_summary["norm_sf"] * 0.3 +
-    city_summary["norm_density"] * 0.2 +
-    city_summary["norm_availability"] * 0.1 +
-    city_summary["norm_activity"] * 0.2 -
-    city_summary["norm_rent"] * 0.2
-)
-
-# 🆕 OPTIONAL STEP 2: Group by industry
-# Insert after city_summary if you want industry-specific views
-industry_summary = df.groupby(["state", "city", "internal_industry"]).agg({
-    "leasedsf": "sum",
-    "rent_per_sf": "mean",
-    "leasing_density": "mean",
-    "availability_score": "mean",
-    "company_name": "count"
-}).reset_index()
-
-# Rename and normalize
-industry_summary.rename(columns={
-    "leasedsf": "total_leased_sf",
-    "rent_per_sf": "avg_rent_per_sf",
-    "leasing_density": "avg_density",
-    "availability_score": "avg_availability_score",
-    "company_name": "lease_activity"
-}, inplace=True)
-
-industry_summary[["norm_sf", "norm_rent", "norm_density", "norm_availability", "norm_activity"]] = scaler.fit_transform(
-    industry_summary[["total_leased_sf", "avg_rent_per_sf", "avg_density", "avg_availability_score", "lease_activity"]]
-)
-
-industry_summary["lease_score"] = (
-    industry_summary["norm_sf"] * 0.3 +
-    industry_summary["norm_density"] * 0.2 +
-    industry_summary["norm_availability"] * 0.1 +
-    industry_summary["norm_activity"] * 0.2 -
-    industry_summary["norm_rent"] * 0.2
-)
-
-# 🆕 STEP 3: Sort and save
-top_cities = city_summary.sort_values(by="lease_score", ascending=False)
-top_cities.to_csv("top_leasing_cities.csv", index=False)
+FEATURES = ["total_leased_sf", "avg_rent_per_sf", "avg_density", "avg_availability_score", "lease_activity"]
+NORMALIZED = ["norm_sf", "norm_rent", "norm_density", "norm_availability", "norm_activity"]
+# Lower rent = better, hence the negative weight
+WEIGHTS = {
+    "total_leased_sf": 0.3,
+    "avg_density": 0.2,
+    "avg_availability_score": 0.1,
+    "lease_activity": 0.2,
+    "avg_rent_per_sf": -0.2,
+}
+MIN_ACTIVITY = 5
+
+
+def lease_score(norm):
+    return sum(norm[name] * weight for name, weight in WEIGHTS.items())
+
+
+def add_lease_score(summary, stats, scheme, keys, previous=None, previous_version=None):
+    # Bounds persist across runs so new cities don't shift existing scores;
+    # rows unchanged since the previous output keep their previous score
+    if previous is not None:
+        previous = previous.set_index(keys)[FEATURES + NORMALIZED + ["lease_score"]]
+        previous.columns = FEATURES + [f"norm:{f}" for f in FEATURES] + ["score"]
+    normalized, scores = rescore(stats, scheme, summary.set_index(keys), FEATURES, lease_score,
+                                 previous, previous_version)
+
+    summary[NORMALIZED] = normalized.to_numpy()
+    summary["lease_score"] = scores.to_numpy()
+    return summary
+
+
+def rank_cities(df, stats, source="leases_cleaned.csv", min_activity=MIN_ACTIVITY, previous=None, previous_version=None):
+    """Score cities (and city/industry pairs) and return both, best city first.
+
+    `previous` is the last city ranking written by main() and
+    `previous_version` its norm_stats_version; cities it already scored
+    are reused when neither their aggregates nor the bounds changed.
+    """
+    df = add_calculated_columns(df)
+
+    # 🆕 STEP 1: Filter out cities with low lease activity
+    city_summary = summarize(df, ["state", "city"])
+    city_summary = city_summary[city_summary["lease_activity"] >= min_activity].copy()
+    city_summary = add_lease_score(city_summary, stats, scheme_for("city_lease_score", source),
+                                   ["state", "city"], previous, previous_version)
+
+    # 🆕 OPTIONAL STEP 2: Group by industry
+    industry_summary = summarize(df, ["state", "city", "internal_industry"])
+    industry_summary = add_lease_score(industry_summary, stats, scheme_for("industry_lease_score", source),
+                                       ["state", "city", "internal_industry"])
+
+    # 🆕 STEP 3: Sort
+    top_cities = city_summary.sort_values(by="lease_score", ascending=False)
+    return top_cities, industry_summary
+
 
 # 🆕 STEP 4: Visualize (Heatmap)
-import seaborn as sns
-import matplotlib.pyplot as plt
-
-heatmap_data = top_cities.head(20).pivot(index="city", columns="state", values="lease_score")
-
-plt.figure(figsize=(12, 8))
-sns.heatmap(heatmap_data, annot=True, fmt=".2f", cmap="YlGnBu", linewidths=0.5)
-plt.title("Top Cities for Leasing by Score")
-plt.xlabel("State")
-plt.ylabel("City")
-plt.tight_layout()
-plt.show()
+def plot_heatmap(top_cities):
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    heatmap_data = top_cities.head(20).pivot(index="city", columns="state", values="lease_score")
+
+    plt.figure(figsize=(12, 8))
+    sns.heatmap(heatmap_data, annot=True, fmt=".2f", cmap="YlGnBu", linewidths=0.5)
+    plt.title("Top Cities for Leasing by Score")
+    plt.xlabel("State")
+    plt.ylabel("City")
+    plt.tight_layout()
+    plt.show()
+
+
+def main(input_path="leases_cleaned.csv", output_path="top_leasing_cities.csv", plot=True, min_activity=MIN_ACTIVITY):
+    # Load your cleaned data
+    df = pd.read_csv(input_path)
+    stats = NormStats.load()
+    scheme = scheme_for("city_lease_score", input_path)
+    # Editing the weights or the activity cutoff invalidates earlier scores
+    definition = fingerprint(WEIGHTS, min_activity)
+    previous, previous_version = load_previous(output_path, scheme, definition)
+    top_cities, industry_summary = rank_cities(df, stats, source=input_path, min_activity=min_activity,
+                                               previous=previous, previous_version=previous_version)
+
+    # Ties the scores to the normalization bounds and score definition they were computed with
+    top_cities["norm_stats_scheme"] = scheme
+    top_cities["score_definition"] = definition
+    top_cities["norm_stats_version"] = stats.version
+    top_cities.to_csv(output_path, index=False)
+    stats.save()
+
+    # Keep every run in the ranking history instead of only the latest CSV
+    RankingHistory().record(top_cities, "lease_score", score="lease_score",
+                            data_version=file_digest(input_path), stats_version=stats.version)
+
+    if plot:
+        plot_heatmap(top_cities)
+    return top_cities
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import best_lease_finder
+from best_lease_finder import MIN_ACTIVITY, add_calculated_columns
+from norm_stats import NormStats, scheme_for
+
+# Same aggregates and weights as best_lease_finder.py (negative = lower is better);
+# FEATURES[i] is the row-level column behind best_lease_finder.FEATURES[i]
+FEATURES = ["leasedsf", "rent_per_sf", "leasing_density", "availability_score", "company_name"]
+AGGREGATES = ["sum", "mean", "mean", "mean", "count"]
+WEIGHTS = np.array([best_lease_finder.WEIGHTS[name] for name in best_lease_finder.FEATURES])
+
+
+def _prepare(df, min_activity):
+    df = add_calculated_columns(df.copy())
+
+    # Keep the same cohort of cities as the point-estimate ranking
+    activity = df.groupby(["state", "city"])["company_name"].transform("count")
+    df = df[activity >= min_activity].sort_values(["state", "city"], kind="stable")
+
+    cities = df[["state", "city"]].drop_duplicates().reset_index(drop=True)
+    sizes = df.groupby(["state", "city"], sort=True).size().to_numpy()
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    # Values for the weighted sums, plus a mask of which ones pandas would count
+    raw = df[FEATURES[:-1]].to_numpy(dtype=float)
+    present = np.column_stack([~np.isnan(raw), df["company_name"].notna().to_numpy()])
+    values = np.column_stack([np.nan_to_num(raw, nan=0.0), present[:, -1]])
+    return cities, sizes, starts, values, present.astype(float)
+
+
+def _score(weights, starts, values, present, bounds=None):
+    """Aggregate and score every replicate at once.
+
+    `weights` is (replicates, rows) resample counts; rows are grouped by
+    city so per-city sums are a single reduceat over the row axis.
+    `bounds` is the (lo, hi) pair best_lease_finder normalized with;
+    without it each replicate gets a fresh min-max fit.
+    """
+    features = np.empty((weights.shape[0], len(starts), len(FEATURES)))
+    for j, how in enumerate(AGGREGATES):
+        total = np.add.reduceat(weights * values[:, j], starts, axis=1)
+        if how == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                total = total / np.add.reduceat(weights * present[:, j], starts, axis=1)
+        features[:, :, j] = total
+
+    if bounds is not None:
+        lo, hi = bounds
+        span = hi - lo
+    else:
+        # Min-max per replicate across cities, as a fresh fit would
+        lo = np.nanmin(features, axis=1, keepdims=True)
+        span = np.nanmax(features, axis=1, keepdims=True) - lo
+    span = np.where(span == 0, 1.0, span)
+    return ((features - lo) / span) @ WEIGHTS
+
+
+def _ranks(scores):
+    # Rank 1 = best score; NaN scores sort last like sort_values does
+    order = np.argsort(np.where(np.isnan(scores), np.inf, -scores), axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[1] + 1), axis=1)
+    return ranks
+
+
+def _replicate_chunk(args):
+    seed, n_replicates, sizes, starts, values, present, bounds = args
+    rng = np.random.default_rng(seed)
+    n_rows = values.shape[0]
+
+    # Draw n rows with replacement inside each city, then turn the draws into
+    # per-row resample counts instead of materializing resampled frames
+    row_start = np.repeat(starts, sizes)
+    row_size = np.repeat(sizes, sizes)
+    draws = row_start + (rng.random((n_replicates, n_rows)) * row_size).astype(np.int64)
+    offsets = np.arange(n_replicates)[:, None] * n_rows
+    weights = np.bincount((draws + offsets).ravel(), minlength=n_replicates * n_rows)
+    weights = weights.reshape(n_replicates, n_rows).astype(float)
+
+    scores = _score(weights, starts, values, present, bounds)
+    return scores, _ranks(scores)
+
+
+def bootstrap_rankings(df, n_replicates=2000, min_activity=MIN_ACTIVITY, chunk_size=250,
+                       workers=None, seed=42, alpha=0.05, top_n=20, bounds=None):
+    """Bootstrap lease rows within each city and summarize the rank spread.
+
+    Returns one row per city with the point-estimate score and rank, the
+    median rank, (1 - alpha) intervals for rank and score, and the share of
+    replicates in which the city made the top `top_n`. Pass the stored
+    `bounds` (see city_bounds) so scores are on the same scale as
+    top_leasing_cities.csv.
+    """
+    cities, sizes, starts, values, present = _prepare(df, min_activity)
+
+    point = _score(np.ones((1, values.shape[0])), starts, values, present, bounds)
+    point_rank = _ranks(point)[0]
+
+    # Independent streams per chunk so results don't depend on worker count
+    chunks = [chunk_size] * (n_replicates // chunk_size)
+    if n_replicates % chunk_size:
+        chunks.append(n_replicates % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    jobs = [(s, n, sizes, starts, values, present, bounds) for s, n in zip(seeds, chunks)]
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(_replicate_chunk, jobs))
+    scores = np.concatenate([r[0] for r in results])
+    ranks = np.concatenate([r[1] for r in results])
+
+    q = [alpha / 2, 0.5, 1 - alpha / 2]
+    rank_q = np.quantile(ranks, q, axis=0)
+    score_q = np.nanquantile(scores, q, axis=0)
+
+    summary = cities.copy()
+    summary["lease_score"] = point[0]
+    summary["rank"] = point_rank
+    summary["rank_median"] = rank_q[1]
+    summary["rank_lo"] = rank_q[0]
+    summary["rank_hi"] = rank_q[2]
+    summary["score_lo"] = score_q[0]
+    summary["score_hi"] = score_q[2]
+    summary[f"p_top{top_n}"] = (ranks <= top_n).mean(axis=0)
+    return summary.sort_values("rank").reset_index(drop=True)
+
+
+def city_bounds(stats, source):
+    """Stored city_lease_score bounds for `source` in FEATURES order, or None if never scored."""
+    try:
+        return stats.bounds(scheme_for("city_lease_score", source), best_lease_finder.FEATURES)
+    except KeyError:
+        return None
+
+
+def main(input_path="leases_cleaned.csv", output_path="city_rank_intervals.csv", n_replicates=2000):
+    df = pd.read_csv(input_path)
+    stats = NormStats.load()
+    bounds = city_bounds(stats, input_path)
+    if bounds is None:
+        print(f"No stored bounds for {input_path}; run best_lease_finder.py first. Using a fresh fit.")
+
+    intervals = bootstrap_rankings(df, n_replicates=n_replicates, bounds=bounds)
+    # Same version column as top_leasing_cities.csv; empty for a fresh fit
+    intervals["norm_stats_version"] = stats.version if bounds is not None else None
+    intervals.to_csv(output_path, index=False)
+    print(intervals.head(20))
+    return intervals
+
+
+if __name__ == "__main__":
+    main()
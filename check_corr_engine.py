@@ -0,0 +1,68 @@
+import numpy as np
+
+from corr_engine import LEASE_AGG, CorrelationEngine, lease_panel, load_leases
+
+TOLERANCE = 1e-10
+
+
+def matrix(frame, group_col, group, variables):
+    sel = frame[frame[group_col] == group]
+    return sel.pivot(index='var_x', columns='var_y', values='r').loc[variables, variables].to_numpy()
+
+
+def lagged_pairs(panel, variables, lag):
+    # x in year t next to y in year t + lag for the same city
+    x = panel.set_index(['city', 'state', 'year'])[variables]
+    y = panel.assign(year=panel['year'] - lag).set_index(['city', 'state', 'year'])[variables]
+    return x.join(y, how='inner', lsuffix='_x', rsuffix='_y')
+
+
+def reference(panel, variables, method):
+    """The same views computed pair by pair with DataFrame.corr."""
+    views = {
+        'year': {y: g[variables].corr(method).to_numpy() for y, g in panel.groupby('year')},
+        'region': {r: g[variables].corr(method).to_numpy() for r, g in panel.groupby('region')},
+        'group': {'all': panel[variables].corr(method).to_numpy()},
+        'lag': {},
+    }
+    for lag in range(3):
+        pairs = lagged_pairs(panel, variables, lag)
+        views['lag'][lag] = np.array([
+            [pairs[[f'{a}_x', f'{b}_y']].corr(method).iloc[0, 1] for b in variables] for a in variables
+        ])
+    return views
+
+
+def check(engine, panel, variables, label):
+    worst = 0.0
+    for method in ['pearson', 'spearman']:
+        expected = reference(panel, variables, method)
+        got = {'year': engine.by_year(method), 'region': engine.by_region(method),
+               'group': engine.overall(method), 'lag': engine.lagged(method)}
+        for view, groups in expected.items():
+            for group, ref in groups.items():
+                diff = np.nanmax(np.abs(matrix(got[view], view, group, variables) - ref))
+                assert np.array_equal(np.isnan(matrix(got[view], view, group, variables)), np.isnan(ref)), \
+                    (label, method, view, group)
+                assert diff < TOLERANCE, (label, method, view, group, diff)
+                worst = max(worst, diff)
+    print(f"{label}: all views match DataFrame.corr (max abs diff {worst:.1e})")
+
+
+def main(input_path="filtered_leases.csv"):
+    panel = lease_panel(load_leases(input_path))
+    variables = list(LEASE_AGG)
+
+    check(CorrelationEngine(panel, variables), panel, variables, "full build")
+
+    # Same panel built incrementally: last two years and last variable added later
+    years = sorted(panel['year'].unique())
+    engine = CorrelationEngine(panel[panel['year'] < years[-2]], variables[:-1])
+    for year in years[-2:]:
+        engine.add_year(panel[panel['year'] == year])
+    engine.add_variable(panel, variables[-1])
+    check(engine, panel, variables, "incremental")
+
+
+if __name__ == "__main__":
+    main()
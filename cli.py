@@ -0,0 +1,64 @@
+import argparse
+import importlib
+import sys
+
+# subcommand -> (module, help). Modules are imported only when their
+# subcommand runs, and they import sklearn/seaborn/matplotlib/plotly only
+# inside the functions that use them, so `--help` and light subcommands
+# never pay for the heavy libraries.
+COMMANDS = {
+    "filter": ("filter_data", "Filter raw leases to tech/legal/financial leases of 10k+ SF"),
+    "preprocess": ("preprocess", "Clean filtered leases and add engineered columns"),
+    "score": ("best_lease_finder", "Score and rank cities for leasing"),
+    "growth": ("grow_dec", "Year-over-year lease growth by city"),
+    "cluster": ("cluster", "KMeans clusters of cities by leasing metrics and industry"),
+    "regress": ("lin_reg", "Random forest model of leased SF by market"),
+    "correlate": ("pop_lease_corr", "Population growth vs. leasing correlation and scoring"),
+    "intervals": ("bootstrap_rank", "Bootstrap rank and score intervals for the city ranking"),
+    "heatmap": ("heat_map", "Heatmap of the top cities by leased SF, rent and activity"),
+    "mine": ("mine", "Score cities on rent, leased SF and availability and map them"),
+    "cluster-map": ("cluster_map", "KMeans clusters of cities on a US map (geocodes via Nominatim)"),
+    "impute": ("missing_values", "Fill missing values with the column mode or mean"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Real estate leasing trend analyses")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, (module, help_text) in COMMANDS.items():
+        p = sub.add_parser(name, help=help_text, description=help_text)
+        p.set_defaults(module=module)
+        p.add_argument("--input", dest="input_path", help="input CSV (default: the script's usual file)")
+
+        if name in ("filter", "preprocess", "score", "growth", "correlate", "impute", "intervals"):
+            p.add_argument("--output", dest="output_path", help="output CSV")
+        if name in ("score", "growth", "cluster", "regress", "correlate", "heatmap", "mine", "cluster-map"):
+            p.add_argument("--no-plot", dest="plot", action="store_false", help="skip the chart")
+        if name in ("cluster", "mine"):
+            p.add_argument("--cities", dest="cities_path", help="uscities.csv with lat/lng")
+        if name == "intervals":
+            p.add_argument("--replicates", dest="n_replicates", type=int, help="bootstrap replicates (default 2000)")
+        if name == "correlate":
+            p.add_argument("--population", dest="population_path", help="Census sub-est2023.csv")
+            p.add_argument("--panel", action="store_true",
+                           help="by-year, by-region and lagged correlations over the city x year panel")
+    return parser
+
+
+def main(argv=None):
+    args = vars(build_parser().parse_args(argv))
+    module = args.pop("module")
+    args.pop("command")
+    if args.pop("panel", False):
+        # The panel engine writes its own table and has no chart
+        module = "corr_engine"
+        args.pop("plot", None)
+
+    # Unset options fall back to each analysis's own defaults
+    kwargs = {k: v for k, v in args.items() if v is not None}
+    importlib.import_module(module).main(**kwargs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
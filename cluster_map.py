@@ -1,12 +1,16 @@
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
 import time
 
-# Initialize geolocator
-geolocator = Nominatim(user_agent="city_locator")
+import pandas as pd
+from mine import summarize_cities
+from validation import load_validated
+
+FEATURES = ['leasedsf', 'internal_class_rent', 'availability_proportion', 'sublet_availability_proportion']
+
 
 # Function to geocode a single city/state
-def get_lat_lon(city, state):
+def get_lat_lon(geolocator, city, state):
+    from geopy.exc import GeocoderTimedOut
+
     try:
         location = geolocator.geocode(f"{city}, {state}, USA")
         if location:
@@ -15,40 +19,66 @@ def get_lat_lon(city, state):
             return pd.Series([None, None])
     except GeocoderTimedOut:
         time.sleep(1)
-        return get_lat_lon(city, state)  # Retry
-
-# Get unique city/state combos
-unique_locations = df[['city', 'state']].drop_duplicates()
-
-# Geocode all
-coords = unique_locations.apply(lambda row: get_lat_lon(row['city'], row['state']), axis=1)
-coords.columns = ['lat', 'lon']
-geo_df = pd.concat([unique_locations.reset_index(drop=True), coords], axis=1)
-
-# Merge into city_stats
-city_stats_with_geo = city_stats.merge(geo_df, on=['city', 'state'], how='left')
-
-import plotly.express as px
-
-# Run clustering again on normalized data
-scaled = scaler.fit_transform(city_stats[['leasedsf', 'internal_class_rent',
-                                          'availability_proportion', 'sublet_availability_proportion']])
-kmeans = KMeans(n_clusters=3, random_state=42)
-city_stats_with_geo['cluster'] = kmeans.fit_predict(scaled)
-
-# Drop cities with missing geocode
-map_df = city_stats_with_geo.dropna(subset=['lat', 'lon'])
-
-# Plot
-fig = px.scatter_geo(
-    map_df,
-    lat='lat',
-    lon='lon',
-    color='cluster',
-    hover_name='city',
-    scope='usa',
-    title='Cluster Map of Cities Based on Corporate Leasing Metrics',
-    template='plotly_white'
-)
-fig.update_traces(marker=dict(size=10, line=dict(width=0.5, color='black')))
-fig.show()
\ No newline at end of file
+        return get_lat_lon(geolocator, city, state)  # Retry
+
+
+def geocode(locations):
+    """lat/lon for each unique city/state, looked up through Nominatim."""
+    from geopy.geocoders import Nominatim
+
+    # Initialize geolocator
+    geolocator = Nominatim(user_agent="city_locator")
+
+    # Get unique city/state combos and geocode all
+    unique_locations = locations[['city', 'state']].drop_duplicates()
+    coords = unique_locations.apply(lambda row: get_lat_lon(geolocator, row['city'], row['state']), axis=1)
+    coords.columns = ['lat', 'lon']
+    return pd.concat([unique_locations.reset_index(drop=True), coords.reset_index(drop=True)], axis=1)
+
+
+def cluster_cities(city_stats, n_clusters=3):
+    """KMeans cluster per city over the standardized leasing metrics."""
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.cluster import KMeans
+
+    # Run clustering on normalized data
+    scaled = StandardScaler().fit_transform(city_stats[FEATURES])
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+    return kmeans.fit_predict(scaled)
+
+
+def plot_cluster_map(map_df):
+    import plotly.express as px
+
+    fig = px.scatter_geo(
+        map_df,
+        lat='lat',
+        lon='lon',
+        color='cluster',
+        hover_name='city',
+        scope='usa',
+        title='Cluster Map of Cities Based on Corporate Leasing Metrics',
+        template='plotly_white'
+    )
+    fig.update_traces(marker=dict(size=10, line=dict(width=0.5, color='black')))
+    fig.show()
+
+
+def main(input_path="filtered_leases.csv", plot=True):
+    df, _ = load_validated(input_path)
+    city_stats = summarize_cities(df, keys=('city', 'state'))
+    city_stats['cluster'] = cluster_cities(city_stats)
+
+    # Merge into city_stats
+    city_stats_with_geo = city_stats.merge(geocode(city_stats), on=['city', 'state'], how='left')
+
+    # Drop cities with missing geocode
+    map_df = city_stats_with_geo.dropna(subset=['lat', 'lon'])
+
+    if plot:
+        plot_cluster_map(map_df)
+    return map_df
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from us_states import state_abbrev
+from validation import load_validated, select_valid
+
+# City x year aggregates of the lease data
+LEASE_AGG = {
+    'leasedsf': 'sum',
+    'overall_rent': 'mean',
+    'availability_proportion': 'mean',
+    'sublet_availability_proportion': 'mean',
+}
+MOMENTS = ['n', 'mx', 'my', 'm2x', 'm2y', 'cxy']
+
+
+# --------------------------
+# Panel construction
+# --------------------------
+def load_leases(input_path):
+    """Validated lease rows, without proportions outside [0, 1]."""
+    df, _ = load_validated(input_path)
+    return select_valid(df, 'out_of_range')
+
+
+def lease_panel(lease_df):
+    """Aggregate lease rows to one row per (city, state, year)."""
+    df = lease_df.copy()
+    df['city'] = df['city'].str.strip().str.lower()
+    df['state'] = df['state'].str.strip().str.lower()
+    panel = df.groupby(['city', 'state', 'year']).agg(LEASE_AGG).reset_index()
+
+    # Each city keeps the region most of its leases are in
+    region = df.groupby(['city', 'state'])['region'].agg(lambda r: r.mode().iat[0] if r.notna().any() else 'Unknown')
+    return panel.merge(region.rename('region').reset_index(), on=['city', 'state'])
+
+
+def population_panel(pop_df):
+    """Year-over-year population growth per (city, state, year) from Census estimates."""
+    year_cols = sorted(c for c in pop_df.columns if c.startswith('POPESTIMATE') and len(c) == 15 and c[11:].isdigit())
+    pop = pop_df[['NAME', 'STNAME'] + year_cols].dropna().copy()
+    pop['state'] = pop['STNAME'].str.strip().str.lower().map(state_abbrev)
+    pop['city'] = pop['NAME'].str.strip().str.lower()
+    pop = pop.dropna(subset=['state']).drop_duplicates(['city', 'state'])
+
+    values = pop[year_cols].to_numpy(dtype=float)
+    growth = pd.DataFrame(values[:, 1:] / values[:, :-1] - 1,
+                          columns=[int(c[11:]) for c in year_cols[1:]], index=pop.index)
+    growth[['city', 'state']] = pop[['city', 'state']]
+    return growth.melt(id_vars=['city', 'state'], var_name='year', value_name='pop_growth_rate')
+
+
+# --------------------------
+# Moment helpers
+# --------------------------
+def _block_moments(x, y, regions):
+    """Centered co-moments for every (x year, region) block in a few einsums.
+
+    `x` is (cities, years, vx) and `y` is (cities, years, vy), already
+    aligned for the lag; `regions` is a (cities, n_regions) one-hot matrix.
+    Pairs are pairwise-complete, like DataFrame.corr. Every array comes
+    back as (years, n_regions, vx, vy).
+    """
+    mx_, my_ = ~np.isnan(x), ~np.isnan(y)
+    x0, y0 = np.where(mx_, x, 0.0), np.where(my_, y, 0.0)
+    mx_, my_ = mx_.astype(float), my_.astype(float)
+
+    def s(a, b):
+        return np.einsum('ctv,ctw,cr->trvw', a, b, regions, optimize=True)
+
+    n = s(mx_, my_)
+    sx, sy = s(x0, my_), s(mx_, y0)
+    sxx, syy, sxy = s(x0 * x0, my_), s(mx_, y0 * y0), s(x0, y0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx, my = np.nan_to_num(sx / n), np.nan_to_num(sy / n)
+    return {
+        'n': n, 'mx': mx, 'my': my,
+        'm2x': sxx - n * mx * mx,
+        'm2y': syy - n * my * my,
+        'cxy': sxy - n * mx * my,
+    }
+
+
+def _pool(m, axes):
+    """Merge centered moments over `axes` (Chan et al. pairwise update, vectorized)."""
+    n = m['n'].sum(axis=axes, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gx = np.nan_to_num((m['n'] * m['mx']).sum(axis=axes, keepdims=True) / n)
+        gy = np.nan_to_num((m['n'] * m['my']).sum(axis=axes, keepdims=True) / n)
+    dx, dy = m['mx'] - gx, m['my'] - gy
+    m2x = (m['m2x'] + m['n'] * dx * dx).sum(axis=axes)
+    m2y = (m['m2y'] + m['n'] * dy * dy).sum(axis=axes)
+    cxy = (m['cxy'] + m['n'] * dx * dy).sum(axis=axes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = cxy / np.sqrt(m2x * m2y)
+    return r, n.squeeze(axis=axes)
+
+
+def _spearman(x, y, groups):
+    """Spearman correlation of every (group, x var, y var) in one batched rank.
+
+    `x` is (obs, vx) and `y` is (obs, vy), aligned row by row; `groups` is
+    an (obs, n_groups) boolean membership matrix. Like DataFrame.corr, each
+    pair is ranked over its own pairwise-complete rows within the group.
+    Returns r and n as (n_groups, vx, vy).
+    """
+    pair = ~np.isnan(x)[:, :, None] & ~np.isnan(y)[:, None, :]
+    keep = groups[:, :, None, None] & pair[:, None]
+    shape = keep.shape
+    xs = np.where(keep, x[:, None, :, None], np.nan).reshape(shape[0], -1)
+    ys = np.where(keep, y[:, None, None, :], np.nan).reshape(shape[0], -1)
+
+    # Average ranks per column, NaN kept out of the ranking
+    rx = pd.DataFrame(xs).rank().to_numpy()
+    ry = pd.DataFrame(ys).rank().to_numpy()
+    n = keep.reshape(shape[0], -1).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dx = rx - np.nansum(rx, axis=0) / n
+        dy = ry - np.nansum(ry, axis=0) / n
+        r = np.nansum(dx * dy, axis=0) / np.sqrt(np.nansum(dx * dx, axis=0) * np.nansum(dy * dy, axis=0))
+    r[n < 2] = np.nan
+    return r.reshape(shape[1:]), n.reshape(shape[1:])
+
+
+class CorrelationEngine:
+    """Pearson and Spearman correlations over a city x year panel.
+
+    Correlations are available by year, by region and at lead/lag offsets
+    of up to `max_lag` years (entry [x, y] at lag L pairs x in year t with
+    y in year t + L). Pearson comes from cached per-(year, region) centered
+    moments, so add_year and add_variable only compute the new blocks.
+    Spearman ranks can't be merged across blocks, so each Spearman view is
+    recomputed from the panel, ranking every pair over exactly the sample
+    that view correlates.
+    """
+
+    def __init__(self, panel, variables, max_lag=2):
+        self.variables = list(variables)
+        self.max_lag = max_lag
+        self.years = sorted(panel['year'].dropna().unique().astype(int))
+        keys = panel[['city', 'state', 'region']].drop_duplicates(['city', 'state'])
+        self.cities = pd.MultiIndex.from_frame(keys[['city', 'state']])
+        self.regions = sorted(keys['region'].unique())
+        self._city_region = keys['region'].to_numpy()
+
+        self._cube = self._to_cube(panel, self.variables, self.years)
+        self._moments = {lag: self._lag_moments(self._cube, self._cube, lag) for lag in self._lags()}
+
+    def _lags(self):
+        return range(min(self.max_lag, len(self.years) - 1) + 1)
+
+    def _to_cube(self, panel, variables, years):
+        idx = panel.set_index(['city', 'state', 'year'])[variables]
+        full = pd.MultiIndex.from_tuples(
+            [(c, s, y) for c, s in self.cities for y in years], names=['city', 'state', 'year']
+        )
+        idx = idx[~idx.index.duplicated()].reindex(full)
+        return idx.to_numpy(dtype=float).reshape(len(self.cities), len(years), len(variables))
+
+    def _onehot(self):
+        return (self._city_region[:, None] == np.array(self.regions)[None, :]).astype(float)
+
+    def _lag_moments(self, x_cube, y_cube, lag, start=0):
+        # x years [start, T - lag) paired with y years [start + lag, T)
+        t = x_cube.shape[1]
+        return _block_moments(x_cube[:, start:t - lag], y_cube[:, start + lag:], self._onehot())
+
+    # --------------------------
+    # Incremental updates
+    # --------------------------
+    def add_year(self, panel):
+        """Append the next year of panel rows; only blocks ending in it are computed."""
+        year = int(panel['year'].iloc[0])
+        if self.years and year <= self.years[-1]:
+            raise ValueError(f"Years must be added in order; got {year} after {self.years[-1]}")
+
+        # New cities get NaN history; new regions get empty blocks
+        keys = panel[['city', 'state', 'region']].drop_duplicates(['city', 'state'])
+        new = ~pd.MultiIndex.from_frame(keys[['city', 'state']]).isin(self.cities)
+        if new.any():
+            self.cities = self.cities.append(pd.MultiIndex.from_frame(keys.loc[new, ['city', 'state']]))
+            self._city_region = np.concatenate([self._city_region, keys.loc[new, 'region'].to_numpy()])
+            pad = np.full((new.sum(),) + self._cube.shape[1:], np.nan)
+            self._cube = np.concatenate([self._cube, pad])
+        added = sorted(set(keys['region']) - set(self.regions))
+        if added:
+            old = len(self.regions)
+            self.regions = sorted(self.regions + added)
+            order = [self.regions.index(r) for r in sorted(set(self.regions) - set(added))]
+            for lag, m in self._moments.items():
+                grown = {k: np.zeros(v.shape[:1] + (len(self.regions),) + v.shape[2:]) for k, v in m.items()}
+                for k in m:
+                    grown[k][:, order] = m[k][:, :old]
+                self._moments[lag] = grown
+
+        self.years.append(year)
+        column = self._to_cube(panel, self.variables, [year])
+        self._cube = np.concatenate([self._cube, column], axis=1)
+
+        t = len(self.years)
+        for lag in self._lags():
+            block = self._lag_moments(self._cube, self._cube, lag, start=t - 1 - lag)
+            m = self._moments.get(lag)
+            self._moments[lag] = block if m is None else {
+                k: np.concatenate([m[k], block[k]]) for k in MOMENTS
+            }
+
+    def add_variable(self, panel, name):
+        """Add one variable; only its row and column of each block are computed."""
+        column = self._to_cube(panel, [name], self.years)
+        grown = np.concatenate([self._cube, column], axis=2)
+        for lag, m in self._moments.items():
+            row = self._lag_moments(column, self._cube, lag)
+            col = self._lag_moments(grown, column, lag)
+            self._moments[lag] = {
+                k: np.concatenate([np.concatenate([m[k], row[k]], axis=2), col[k]], axis=3)
+                for k in MOMENTS
+            }
+        self._cube = grown
+        self.variables.append(name)
+
+    # --------------------------
+    # Queries
+    # --------------------------
+    def _frame(self, r, n, groups, name):
+        v = len(self.variables)
+        out = pd.DataFrame({
+            name: np.repeat(groups, v * v),
+            'var_x': np.tile(np.repeat(self.variables, v), len(groups)),
+            'var_y': np.tile(self.variables, v * len(groups)),
+            'r': r.reshape(-1),
+            'n': n.reshape(-1).astype(int),
+        })
+        return out
+
+    def _observations(self, lag=0):
+        # (city, year) rows of x paired with the same city lag years later
+        c, t, v = self._cube.shape
+        x = self._cube[:, :t - lag].reshape(-1, v)
+        y = self._cube[:, lag:].reshape(-1, v)
+        return x, y
+
+    def overall(self, method='pearson'):
+        if method == 'spearman':
+            x, y = self._observations()
+            r, n = _spearman(x, y, np.ones((len(x), 1), dtype=bool))
+        else:
+            r, n = _pool(self._moments[0], (0, 1))
+            r, n = r[None], n[None]
+        return self._frame(r, n, ['all'], 'group')
+
+    def by_year(self, method='pearson'):
+        if method == 'spearman':
+            x, y = self._observations()
+            years = np.tile(np.arange(len(self.years)), len(self.cities))
+            r, n = _spearman(x, y, years[:, None] == np.arange(len(self.years))[None, :])
+        else:
+            r, n = _pool(self._moments[0], (1,))
+        return self._frame(r, n, self.years, 'year')
+
+    def by_region(self, method='pearson'):
+        if method == 'spearman':
+            x, y = self._observations()
+            r, n = _spearman(x, y, np.repeat(self._onehot(), len(self.years), axis=0).astype(bool))
+        else:
+            r, n = _pool(self._moments[0], (0,))
+        return self._frame(r, n, self.regions, 'region')
+
+    def lagged(self, method='pearson'):
+        lags = list(self._moments)
+        if method == 'spearman':
+            pooled = []
+            for lag in lags:
+                x, y = self._observations(lag)
+                r, n = _spearman(x, y, np.ones((len(x), 1), dtype=bool))
+                pooled.append((r[0], n[0]))
+        else:
+            pooled = [_pool(self._moments[lag], (0, 1)) for lag in lags]
+        r = np.stack([p[0] for p in pooled])
+        n = np.stack([p[1] for p in pooled])
+        return self._frame(r, n, lags, 'lag')
+
+
+def main(input_path="filtered_leases.csv", population_path="sub-est2023.csv",
+         output_path="city_correlations.csv"):
+    panel = lease_panel(load_leases(input_path))
+    variables = list(LEASE_AGG)
+
+    # Population growth is optional; the Census extract isn't always present
+    if os.path.exists(population_path):
+        pop = population_panel(pd.read_csv(population_path, encoding="ISO-8859-1"))
+        panel = panel.merge(pop, on=['city', 'state', 'year'], how='left')
+        variables = ['pop_growth_rate'] + variables
+
+    engine = CorrelationEngine(panel, variables)
+
+    results = []
+    for method in ['pearson', 'spearman']:
+        for name, frame in [('year', engine.by_year(method)), ('region', engine.by_region(method)),
+                            ('lag', engine.lagged(method))]:
+            frame = frame.rename(columns={name: 'group'})
+            frame.insert(0, 'breakdown', name)
+            frame.insert(0, 'method', method)
+            results.append(frame)
+    results = pd.concat(results, ignore_index=True)
+    results.to_csv(output_path, index=False)
+    print(results[(results['breakdown'] == 'lag') & (results['var_x'] != results['var_y'])])
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,39 @@
 import pandas as pd
+from validation import save_validated, validate
 
-# Load the CSV file
-df = pd.read_csv('Leases.csv')
 
-# Ensure column names are lowercase (optional)
-df.columns = df.columns.str.lower()
+def filter_leases(df):
+    """Keep tech/legal/financial leases of 10k+ SF that have a market cluster."""
+    # Ensure column names are lowercase (optional)
+    df = df.rename(columns=str.lower)
 
-# Filter with partial match using regex and case-insensitive search
-filtered_df = df[
-    (df['leasedsf'] >= 10000) &
-    (df['internal_industry'].str.contains('tech|legal|financial', case=False, na=False)) &
-    (df['internal_market_cluster'].notna()) &
-    (df['internal_market_cluster'].str.strip() != '')
-]
+    # Filter with partial match using regex and case-insensitive search
+    return df[
+        (df['leasedsf'] >= 10000) &
+        (df['internal_industry'].str.contains('tech|legal|financial', case=False, na=False)) &
+        (df['internal_market_cluster'].notna()) &
+        (df['internal_market_cluster'].str.strip() != '')
+    ]
 
-# Preview filtered data
-print(filtered_df.head())
 
-# Optionally save it
-filtered_df.to_csv('filtered_leases.csv', index=False)
+def main(input_path='Leases.csv', output_path='filtered_leases.csv'):
+    # Load the CSV file
+    df = pd.read_csv(input_path)
+    filtered_df = filter_leases(df)
+
+    # Flag bad rows once so downstream scripts can filter on the mask
+    validated_df, counts = validate(filtered_df)
+    print("Rule violations:\n", counts[counts > 0])
+
+    # Preview filtered data
+    print(validated_df.head())
+
+    # Optionally save it (with the rule fingerprint, so the mask can be reused).
+    # The raw values are saved, not the coerced ones, so a non-numeric entry
+    # is still there to inspect; load_validated coerces on read.
+    save_validated(filtered_df.assign(violations=validated_df['violations'].to_numpy()), output_path)
+    return validated_df
+
+
+if __name__ == "__main__":
+    main()
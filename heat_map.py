@@ -1,50 +1,73 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+from validation import load_validated
+from norm_stats import NormStats, scheme_for
 
-# Load your lease data
-df = pd.read_csv("filtered_leases.csv")  # Update with your file path
-
-# --- Data Cleaning ---
-df['leasedsf'] = pd.to_numeric(df['leasedsf'], errors='coerce')
-df['overall_rent'] = pd.to_numeric(df['overall_rent'], errors='coerce')
-df['city'] = df['city'].str.strip().str.title()
-df['state'] = df['state'].str.upper()
 
 # --- Aggregate by City and State ---
-city_summary = df.groupby(['state', 'city']).agg({
-    'leasedsf': 'sum',
-    'overall_rent': 'mean',
-    'building_id': 'count'
-}).reset_index()
-
-city_summary.rename(columns={
-    'leasedsf': 'total_leased_sf',
-    'overall_rent': 'avg_rent',
-    'building_id': 'lease_activity'
-}, inplace=True)
-
-# --- Normalize data for heatmap ---
-from sklearn.preprocessing import MinMaxScaler
-scaler = MinMaxScaler()
-city_summary[['norm_leased_sf', 'norm_avg_rent', 'norm_lease_activity']] = scaler.fit_transform(
-    city_summary[['total_leased_sf', 'avg_rent', 'lease_activity']]
-)
-
-# --- Create a "score" for leasing potential ---
-city_summary['leasing_score'] = (city_summary['norm_leased_sf'] * 0.4 +
-                                 city_summary['norm_avg_rent'] * -0.3 +  # Lower rent = better
-                                 city_summary['norm_lease_activity'] * 0.3)
-
-# --- Top Cities by Leasing Score ---
-top_cities = city_summary.sort_values('leasing_score', ascending=False).head(20)
+def summarize_cities(df):
+    # --- Data Cleaning --- (on a copy; the caller's frame is left alone)
+    df = df.copy()
+    df['city'] = df['city'].str.strip().str.title()
+    df['state'] = df['state'].str.upper()
+
+    city_summary = df.groupby(['state', 'city']).agg({
+        'leasedsf': 'sum',
+        'overall_rent': 'mean',
+        'building_id': 'count'
+    }).reset_index()
+
+    city_summary.rename(columns={
+        'leasedsf': 'total_leased_sf',
+        'overall_rent': 'avg_rent',
+        'building_id': 'lease_activity'
+    }, inplace=True)
+    return city_summary
+
+
+# --- Normalize data and create a "score" for leasing potential ---
+def score_cities(city_summary, stats, source="filtered_leases.csv"):
+    city_summary[['norm_leased_sf', 'norm_avg_rent', 'norm_lease_activity']] = stats.fit_transform(
+        scheme_for('heat_map', source),
+        city_summary[['total_leased_sf', 'avg_rent', 'lease_activity']]
+    )
+
+    city_summary['leasing_score'] = (city_summary['norm_leased_sf'] * 0.4 +
+                                     city_summary['norm_avg_rent'] * -0.3 +  # Lower rent = better
+                                     city_summary['norm_lease_activity'] * 0.3)
+    return city_summary
+
 
 # --- Plot Heatmap ---
-plt.figure(figsize=(12, 8))
-heatmap_data = top_cities.pivot(index="city", columns="state", values="leasing_score")
-sns.heatmap(heatmap_data, annot=True, fmt=".2f", cmap="YlGnBu", linewidths=0.5)
-plt.title("Top Leasing Locations by Score (Best = High Score)")
-plt.xlabel("State")
-plt.ylabel("City")
-plt.tight_layout()
-plt.show()
+def plot_heatmap(top_cities):
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 8))
+    heatmap_data = top_cities.pivot(index="city", columns="state", values="leasing_score")
+    sns.heatmap(heatmap_data, annot=True, fmt=".2f", cmap="YlGnBu", linewidths=0.5)
+    plt.title("Top Leasing Locations by Score (Best = High Score)")
+    plt.xlabel("State")
+    plt.ylabel("City")
+    plt.tight_layout()
+    plt.show()
+
+
+def main(input_path="filtered_leases.csv", plot=True):
+    # Load your lease data
+    # (numeric columns come back coerced, with a per-row `violations` mask)
+    df, _ = load_validated(input_path)
+
+    stats = NormStats.load()
+    city_summary = score_cities(summarize_cities(df), stats, source=input_path)
+    stats.save()
+
+    # --- Top Cities by Leasing Score ---
+    top_cities = city_summary.sort_values('leasing_score', ascending=False).head(20)
+    print(top_cities[['state', 'city', 'leasing_score']])
+
+    if plot:
+        plot_heatmap(top_cities)
+    return top_cities
+
+
+if __name__ == "__main__":
+    main()
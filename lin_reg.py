@@ -1,20 +1,4 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.impute import SimpleImputer
-
-# Load and clean data
-df = pd.read_csv('filtered_leases.csv')
-df.columns = df.columns.str.lower()
-
-# Replace empty strings with NaN
-df = df.replace(r'^\s*$', pd.NA, regex=True)
-
-# Drop rows with missing target
-df = df.dropna(subset=['leasedsf'])
 
 # Define features and target
 features = [
@@ -24,72 +8,112 @@ features = [
 ]
 target = 'leasedsf'
 
-X = df[features]
-y = df[target]
 
-# Separate column types
-cat_features = X.select_dtypes(include='object').columns.tolist()
-num_features = X.select_dtypes(exclude='object').columns.tolist()
+def load_training_data(df):
+    df = df.rename(columns=str.lower)
+
+    # Replace empty strings with NaN
+    df = df.replace(r'^\s*$', pd.NA, regex=True)
+
+    # Drop rows with missing target
+    df = df.dropna(subset=[target])
+    return df[features].copy(), df[target]
+
+
+def build_model(X):
+    from sklearn.pipeline import Pipeline
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+    from sklearn.impute import SimpleImputer
+
+    # Separate column types
+    cat_features = X.select_dtypes(include='object').columns.tolist()
+    num_features = X.select_dtypes(exclude='object').columns.tolist()
+
+    # Imputers
+    cat_imputer = SimpleImputer(strategy='most_frequent')
+    num_imputer = SimpleImputer(strategy='mean')
+
+    # Preprocessing pipelines
+    cat_pipeline = Pipeline([
+        ('imputer', cat_imputer),
+        ('encoder', OneHotEncoder(handle_unknown='ignore'))
+    ])
+
+    num_pipeline = Pipeline([
+        ('imputer', num_imputer)
+    ])
+
+    preprocessor = ColumnTransformer([
+        ('cat', cat_pipeline, cat_features),
+        ('num', num_pipeline, num_features)
+    ])
+
+    # Final pipeline
+    return Pipeline([
+        ('preprocessor', preprocessor),
+        ('regressor', RandomForestRegressor(n_estimators=100, random_state=42))
+    ])
+
+
+def train(X, y):
+    """Fit the leased-SF model on a train split and print held-out MAE and R²."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    model = build_model(X)
 
-# Imputers
-cat_imputer = SimpleImputer(strategy='most_frequent')
-num_imputer = SimpleImputer(strategy='mean')
+    # Train/test split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Preprocessing pipelines
-cat_pipeline = Pipeline([
-    ('imputer', cat_imputer),
-    ('encoder', OneHotEncoder(handle_unknown='ignore'))
-])
+    # Train model
+    model.fit(X_train, y_train)
 
-num_pipeline = Pipeline([
-    ('imputer', num_imputer)
-])
+    # Predict on test set
+    y_pred = model.predict(X_test)
 
-preprocessor = ColumnTransformer([
-    ('cat', cat_pipeline, cat_features),
-    ('num', num_pipeline, num_features)
-])
+    # Optional: Score the model
+    print(f"MAE: {mean_absolute_error(y_test, y_pred):,.2f}")
+    print(f"R²: {r2_score(y_test, y_pred):.2f}")
+    return model
 
-# Final pipeline
-model = Pipeline([
-    ('preprocessor', preprocessor),
-    ('regressor', RandomForestRegressor(n_estimators=100, random_state=42))
-])
 
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+def plot_top_cities(top_cities):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-# Train model
-model.fit(X_train, y_train)
+    # Set style
+    sns.set(style="whitegrid")
 
-# Predict on test set
-y_pred = model.predict(X_test)
+    # Plot Top 10 Cities
+    plt.figure(figsize=(12, 6))
+    sns.barplot(x=top_cities.head(10).values, y=top_cities.head(10).index, palette='Blues_d')
+    plt.title('Top 10 Cities by Predicted Leasing Performance')
+    plt.xlabel('Predicted Average Leased SF')
+    plt.ylabel('City')
+    plt.tight_layout()
+    plt.show()
 
-# Optional: Score the model
-from sklearn.metrics import mean_absolute_error, r2_score
 
-print(f"MAE: {mean_absolute_error(y_test, y_pred):,.2f}")
-print(f"R²: {r2_score(y_test, y_pred):.2f}")
+def main(input_path='filtered_leases.csv', plot=True):
+    # Load and clean data
+    df = pd.read_csv(input_path)
+    X, y = load_training_data(df)
+    model = train(X, y)
 
-X['predicted_leasedsf'] = model.predict(X)
+    X['predicted_leasedsf'] = model.predict(X)
 
-top_submarkets = X.groupby('internal_submarket')['predicted_leasedsf'].mean().sort_values(ascending=False)
-top_cities = X.groupby('market')['predicted_leasedsf'].mean().sort_values(ascending=False)
+    top_submarkets = X.groupby('internal_submarket')['predicted_leasedsf'].mean().sort_values(ascending=False)
+    top_cities = X.groupby('market')['predicted_leasedsf'].mean().sort_values(ascending=False)
 
-print("Top Submarkets:\n", top_submarkets.head(10))
-print("\nTop Cities:\n", top_cities.head(10))
+    print("Top Submarkets:\n", top_submarkets.head(10))
+    print("\nTop Cities:\n", top_cities.head(10))
 
-import matplotlib.pyplot as plt
-import seaborn as sns
+    if plot:
+        plot_top_cities(top_cities)
+    return top_cities
 
-# Set style
-sns.set(style="whitegrid")
 
-# Plot Top 10 Cities
-plt.figure(figsize=(12, 6))
-sns.barplot(x=top_cities.head(10).values, y=top_cities.head(10).index, palette='Blues_d')
-plt.title('Top 10 Cities by Predicted Leasing Performance')
-plt.xlabel('Predicted Average Leased SF')
-plt.ylabel('City')
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,45 @@
 import pandas as pd
 
-# Load the CSV
-df = pd.read_csv('filtered_leases.csv')
-
-# Standardize column names
-df.columns = df.columns.str.lower()
-
-df['some_numeric_column'] = df['some_numeric_column'].replace('[\$,]', '', regex=True).astype(float)
-
-# Replace empty strings with NaN (if not already handled)
-df = df.replace(r'^\s*$', pd.NA, regex=True)
-
-# Loop through columns and fill missing values
-for col in df.columns:
-    if df[col].dtype == 'object':
-        # Fill categorical columns with mode
-        mode = df[col].mode(dropna=True)
-        if not mode.empty:
-            df[col].fillna(mode[0], inplace=True)
-    else:
-        # Fill numeric columns with mean
-        mean = df[col].mean(skipna=True)
-        df[col].fillna(mean, inplace=True)
-
-# Optional: Confirm there are no more missing values
-print(df.isna().sum().sort_values(ascending=False).head())
+
+def fill_missing(df, currency_columns=()):
+    """Fill gaps with the column mode (text) or mean (numbers).
+
+    `currency_columns` are parsed from strings like "$1,200" first.
+    """
+    # Standardize column names (renaming returns a copy, so the caller's frame is untouched)
+    df = df.rename(columns=str.lower)
+
+    for col in currency_columns:
+        df[col] = df[col].replace(r'[\$,]', '', regex=True).astype(float)
+
+    # Replace empty strings with NaN (if not already handled)
+    df = df.replace(r'^\s*$', pd.NA, regex=True)
+
+    # Loop through columns and fill missing values
+    for col in df.columns:
+        if df[col].dtype == 'object' or pd.api.types.is_string_dtype(df[col]):
+            # Fill categorical columns with mode
+            mode = df[col].mode(dropna=True)
+            if not mode.empty:
+                df[col] = df[col].fillna(mode[0])
+        else:
+            # Fill numeric columns with mean
+            mean = df[col].mean(skipna=True)
+            df[col] = df[col].fillna(mean)
+    return df
+
+
+def main(input_path='filtered_leases.csv', output_path=None):
+    # Load the CSV
+    df = fill_missing(pd.read_csv(input_path))
+
+    # Optional: Confirm there are no more missing values
+    print(df.isna().sum().sort_values(ascending=False).head())
+
+    if output_path:
+        df.to_csv(output_path, index=False)
+    return df
+
+
+if __name__ == "__main__":
+    main()
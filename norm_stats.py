@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Default location of the persisted statistics, next to the CSV outputs
+STATS_PATH = "norm_stats.json"
+
+
+class NormStats:
+    """Persisted min/max (or quantile) bounds per scoring scheme and feature.
+
+    Unkeyed bounds only ever widen as new rows arrive, the same way
+    MinMaxScaler.partial_fit behaves. Keyed bounds (one value per
+    aggregate, e.g. per city) are taken over the current per-key values,
+    so a revised or dropped city leaves the range again; in both cases
+    adding a city does not move any other city's score unless it lands
+    outside the current range. Every
+    change to a bound is appended to a version log, so older score
+    snapshots can be rebuilt from the bounds that were in force then;
+    outputs record `version` for that purpose.
+
+    Schemes are named per data source (see scheme_for), so an ad-hoc run
+    on another file gets its own bounds instead of widening the
+    production ones; reset() starts a scheme over.
+    """
+
+    def __init__(self):
+        # scheme -> {"quantiles": (lo, hi) or None, "features": {name: state}}
+        self.schemes = {}
+        # Append-only log of bound changes: [{"version", "scheme", "bounds"}]
+        self.history = []
+
+    @property
+    def version(self):
+        return len(self.history)
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+    @classmethod
+    def load(cls, path=STATS_PATH):
+        stats = cls()
+        if not os.path.exists(path):
+            return stats
+        with open(path) as f:
+            data = json.load(f)
+        for scheme, entry in data["schemes"].items():
+            quantiles = tuple(entry["quantiles"]) if entry["quantiles"] else None
+            stats.schemes[scheme] = {"quantiles": quantiles, "features": entry["features"]}
+        stats.history = data["history"]
+        return stats
+
+    def save(self, path=STATS_PATH):
+        with open(path, "w") as f:
+            json.dump({"schemes": self.schemes, "history": self.history}, f)
+
+    # ----------------------------------------
+    # Incremental updates
+    # ----------------------------------------
+    def update(self, scheme, frame, quantiles=None, keyed=False):
+        """Fold new aggregate rows into the bounds of `scheme`.
+
+        With `keyed=True` the frame's index identifies each aggregate (e.g.
+        state/city) and holds the full current set: its values replace the
+        stored ones, keys missing from it are dropped, and min/max are
+        recomputed from what remains, so re-running on the same aggregates
+        changes nothing. Quantile
+        bounds, enabled by `quantiles=(lo, hi)` the first time a scheme is
+        seen, are taken over those per-key values and need keyed updates.
+        Returns the list of features whose bounds moved.
+        """
+        entry = self.schemes.setdefault(
+            scheme, {"quantiles": list(quantiles) if quantiles else None, "features": {}}
+        )
+        if entry["quantiles"] and not keyed:
+            raise ValueError(f"Scheme '{scheme}' uses quantile bounds; update it with keyed=True")
+        keys = _keys(frame.index) if keyed else None
+
+        changed = {}
+        for name in frame.columns:
+            col = frame[name].to_numpy(dtype=float)
+            present = ~np.isnan(col)
+            state = entry["features"].get(name)
+            if state is None and not present.any():
+                continue
+            old = _bounds(state, entry["quantiles"]) if state else None
+            if state is None:
+                state = {"min": float(col[present].min()), "max": float(col[present].max())}
+                entry["features"][name] = state
+            if keyed:
+                # NaN is stored as None so a missing value still counts as seen
+                state["values"] = dict(zip(keys, [v if ok else None for v, ok in zip(col.tolist(), present)]))
+                if present.any():
+                    state["min"] = float(col[present].min())
+                    state["max"] = float(col[present].max())
+            elif present.any():
+                state["min"] = min(state["min"], float(col[present].min()))
+                state["max"] = max(state["max"], float(col[present].max()))
+            new = _bounds(state, entry["quantiles"])
+            if new != old:
+                changed[name] = list(new)
+        if changed:
+            self.history.append({"version": self.version + 1, "scheme": scheme, "bounds": changed})
+        return list(changed)
+
+    def moved_since(self, scheme, version):
+        """Whether any bound of `scheme` changed after `version`."""
+        if version > self.version:
+            return True
+        return any(record["scheme"] == scheme for record in self.history[version:])
+
+    def reset(self, scheme):
+        """Forget a scheme's bounds; earlier versions stay reproducible."""
+        self.schemes.pop(scheme, None)
+        self.history.append({"version": self.version + 1, "scheme": scheme, "bounds": {}, "reset": True})
+
+    def bounds(self, scheme, features, version=None):
+        """Return (lo, hi) arrays for `features` as of `version` (default: latest)."""
+        if version is None:
+            version = self.version
+        current = {}
+        for record in self.history[:version]:
+            if record["scheme"] == scheme:
+                if record.get("reset"):
+                    current = {}
+                current.update(record["bounds"])
+        missing = [name for name in features if name not in current]
+        if missing:
+            raise KeyError(f"No bounds for {missing} in scheme '{scheme}' at version {version}")
+        lo = np.array([current[name][0] for name in features], dtype=float)
+        hi = np.array([current[name][1] for name in features], dtype=float)
+        return lo, hi
+
+    def transform(self, scheme, frame, version=None):
+        """Scale `frame` to [0, 1] with stored bounds, like MinMaxScaler.transform."""
+        lo, hi = self.bounds(scheme, list(frame.columns), version)
+        span = hi - lo
+        # Constant features map to 0, matching MinMaxScaler
+        span[span == 0] = 1.0
+        scaled = (frame.to_numpy(dtype=float) - lo) / span
+        if self.schemes[scheme]["quantiles"]:
+            scaled = np.clip(scaled, 0.0, 1.0)
+        return scaled
+
+    def fit_transform(self, scheme, frame, quantiles=None, keyed=False):
+        """Drop-in for MinMaxScaler().fit_transform backed by the persisted bounds."""
+        self.update(scheme, frame, quantiles=quantiles, keyed=keyed)
+        return self.transform(scheme, frame)
+
+
+def scheme_for(name, source):
+    """Scheme name scoped to the input file it was fitted on."""
+    return f"{name}@{os.path.basename(source)}"
+
+
+def fingerprint(*parts):
+    """Short hash of a score definition (weights, filters), stored with outputs."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:12]
+
+
+def _keys(index):
+    # JSON-friendly aggregate keys: "NY|New York" for a (state, city) index
+    if isinstance(index, pd.MultiIndex):
+        return ["|".join(map(str, key)) for key in index]
+    return [str(key) for key in index]
+
+
+def _bounds(state, quantiles):
+    if quantiles:
+        values = [v for v in state["values"].values() if v is not None]
+        lo, hi = np.quantile(values, quantiles)
+        return [float(lo), float(hi)]
+    return [state["min"], state["max"]]
+
+
+def load_previous(path, scheme, definition):
+    """Last run's output at `path` and its stats version.
+
+    Only returned when it was scored under `scheme` with the same score
+    `definition` (see fingerprint); otherwise (None, None).
+    """
+    if not os.path.exists(path):
+        return None, None
+    previous = pd.read_csv(path, float_precision="round_trip")
+    if previous.empty or not {"norm_stats_scheme", "score_definition"} <= set(previous.columns):
+        return None, None
+    if previous["norm_stats_scheme"].iloc[0] != scheme or previous["score_definition"].iloc[0] != definition:
+        return None, None
+    return previous, int(previous["norm_stats_version"].iloc[0])
+
+
+def rescore(stats, scheme, summary, features, score_fn, previous=None, previous_version=None):
+    """Normalize and score keyed aggregates, recomputing only the rows that need it.
+
+    `summary` is indexed by aggregate key (e.g. state/city) and holds the
+    raw `features`. `previous` is the last run's result on the same index:
+    the raw `features` it was computed from, their normalized values as
+    "norm:<feature>" and a `score` column, at stats version
+    `previous_version`. A row is recomputed when it is new, its raw
+    features differ from the ones in `previous`, or a bound of the scheme
+    moved since then; every other row is copied from `previous`.
+    `score_fn` maps a frame of normalized features to a score Series.
+    Returns (normalized features, scores).
+    """
+    raw = summary[features]
+    stats.update(scheme, raw, keyed=True)
+
+    target = np.ones(len(raw), dtype=bool)
+    if previous is not None and previous_version is not None and not stats.moved_since(scheme, previous_version):
+        seen = raw.index.isin(previous.index)
+        old = previous.reindex(raw.index[seen])[features].to_numpy(dtype=float)
+        new = raw[seen].to_numpy(dtype=float)
+        same = ((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+        target[np.flatnonzero(seen)[same]] = False
+
+    normalized = pd.DataFrame(np.nan, index=raw.index, columns=features)
+    scores = pd.Series(np.nan, index=raw.index)
+    if not target.all():
+        kept = raw.index[~target]
+        normalized.loc[kept] = previous.loc[kept, [f"norm:{f}" for f in features]].to_numpy()
+        scores.loc[kept] = previous.loc[kept, "score"].to_numpy()
+    if target.any():
+        normalized.loc[target] = stats.transform(scheme, raw[target])
+        scores.loc[target] = score_fn(normalized.loc[target]).to_numpy()
+    return normalized, scores
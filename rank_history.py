@@ -0,0 +1,238 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Default location of the snapshot store, next to the CSV outputs
+HISTORY_DIR = "ranking_history"
+MANIFEST_COLUMNS = ["version", "scheme", "data_version", "stats_version", "created_at", "rows"]
+# One row of the per-city index: which snapshot, and the city's score and rank in it
+INDEX_DTYPE = np.dtype([("version", np.int32), ("score", np.float64), ("rank", np.float32)])
+
+
+def file_digest(path):
+    """Short content hash of an input file, used as its data version."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def city_key(frame):
+    # "Nashville, TN" when a state column exists, otherwise just "Nashville"
+    city = frame["city"].astype(str).str.strip().str.title()
+    if "state" in frame.columns:
+        return city + ", " + frame["state"].astype(str).str.strip().str.upper()
+    return city
+
+
+class RankingHistory:
+    """Append-only store of ranking snapshots (city, scheme, score, rank, data version).
+
+    Each snapshot is one compressed .npz of three columns: an int32 city
+    code, the score and a float32 rank (NaN for cities with no score). City names live once in an
+    append-only dictionary and snapshot metadata in manifest.csv, so a
+    snapshot costs a few bytes per city. Snapshots are never rewritten.
+
+    record() also keeps a city-ordered index (every snapshot row grouped by
+    city code, plus each city's offset), stored as plain .npy files so
+    history() can memory-map it and read one city's rows without touching
+    the snapshots.
+    """
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._manifest_path = os.path.join(root, "manifest.csv")
+        self._cities_path = os.path.join(root, "cities.txt")
+
+    # ----------------------------------------
+    # Storage
+    # ----------------------------------------
+    def manifest(self):
+        if not os.path.exists(self._manifest_path):
+            return pd.DataFrame(columns=MANIFEST_COLUMNS)
+        return pd.read_csv(self._manifest_path, dtype={"data_version": str}, parse_dates=["created_at"])
+
+    def cities(self):
+        if not os.path.exists(self._cities_path):
+            return []
+        with open(self._cities_path) as f:
+            return f.read().splitlines()
+
+    def _snapshot_path(self, version):
+        return os.path.join(self.root, f"snapshot-{version:06d}.npz")
+
+    def record(self, frame, scheme, score, data_version, rank=None, stats_version=None):
+        """Append a snapshot of `frame` (city[, state] and score columns); returns its version.
+
+        `stats_version` is the NormStats version the scores were normalized
+        with, so the snapshot can be rebuilt with transform(version=...).
+        """
+        frame = frame.assign(_key=city_key(frame)).sort_values(score, ascending=False)
+        # Scores with duplicate city keys (e.g. from fuzzy joins) keep the best row
+        frame = frame.drop_duplicates("_key")
+        # Unscored cities keep a NaN rank rather than a bogus integer one
+        ranks = frame[rank] if rank else frame[score].rank(ascending=False, method="first")
+
+        known = self.cities()
+        codes = {name: i for i, name in enumerate(known)}
+        fresh = [k for k in frame["_key"] if k not in codes]
+        if fresh:
+            with open(self._cities_path, "a") as f:
+                f.writelines(k + "\n" for k in fresh)
+            codes.update({k: len(known) + i for i, k in enumerate(fresh)})
+
+        manifest = self.manifest()
+        version = int(manifest["version"].max()) + 1 if len(manifest) else 1
+        np.savez_compressed(
+            self._snapshot_path(version),
+            city=frame["_key"].map(codes).to_numpy(dtype=np.int32),
+            score=frame[score].to_numpy(dtype=float),
+            rank=ranks.to_numpy(dtype=np.float32),
+        )
+        entry = pd.DataFrame([[version, scheme, data_version, stats_version,
+                               datetime.now(timezone.utc).isoformat(), len(frame)]],
+                             columns=MANIFEST_COLUMNS)
+        entry.to_csv(self._manifest_path, mode="a", header=not os.path.exists(self._manifest_path), index=False)
+        self._update_index(version)
+        return version
+
+    def _snapshot(self, version):
+        # One snapshot's columns, read straight from its own file
+        with np.load(self._snapshot_path(version)) as snap:
+            return {col: snap[col] for col in ["city", "score", "rank"]}
+
+    def _index_path(self, version, part):
+        return os.path.join(self.root, f"index-{version:06d}.{part}.npy")
+
+    def _index_version(self):
+        # Latest snapshot version folded into the persisted index (0 = none yet)
+        found = [int(name[6:12]) for name in os.listdir(self.root)
+                 if name.startswith("index-") and name.endswith(".rows.npy")]
+        return max(found, default=0)
+
+    def _update_index(self, through):
+        """Fold snapshots newer than the persisted index into it; returns the index version.
+
+        Also catches up a store whose index is missing or behind the
+        manifest, e.g. after an interrupted record().
+        """
+        have = self._index_version()
+        manifest = self.manifest()
+        missing = [int(v) for v in manifest["version"] if have < v <= through]
+        if not missing:
+            return have
+
+        n_cities = len(self.cities())
+        if have:
+            rows = np.load(self._index_path(have, "rows"))
+            offsets = np.load(self._index_path(have, "offsets"))
+        else:
+            rows = np.empty(0, dtype=INDEX_DTYPE)
+            offsets = np.zeros(1, dtype=np.int64)
+        # Cities first seen since the last index start out with no rows
+        offsets = np.concatenate([offsets, np.full(n_cities + 1 - len(offsets), offsets[-1])])
+
+        codes, new = [], []
+        for version in missing:
+            snap = self._snapshot(version)
+            part = np.empty(len(snap["city"]), dtype=INDEX_DTYPE)
+            part["version"] = version
+            part["score"] = snap["score"]
+            part["rank"] = snap["rank"]
+            codes.append(snap["city"])
+            new.append(part)
+        codes, new = np.concatenate(codes), np.concatenate(new)
+
+        # Stable sort keeps versions ascending within a city; each new row goes
+        # to the end of its city's block, then every later block shifts down
+        order = np.argsort(codes, kind="stable")
+        codes, new = codes[order], new[order]
+        rows = np.insert(rows, offsets[codes + 1], new)
+        offsets = offsets + np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_cities))])
+
+        # Offsets first: an index only counts once its rows file is in place
+        version = missing[-1]
+        for part, arr in [("offsets", offsets), ("rows", rows)]:
+            tmp = self._index_path(version, part) + ".tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp, self._index_path(version, part))
+        if have:
+            for part in ["rows", "offsets"]:
+                os.remove(self._index_path(have, part))
+        return version
+
+    # ----------------------------------------
+    # Queries
+    # ----------------------------------------
+    def resolve(self, scheme, version=None, when=None):
+        """Latest snapshot version of `scheme` at or before `version` / timestamp `when`."""
+        manifest = self.manifest()
+        manifest = manifest[manifest["scheme"] == scheme]
+        if version is not None:
+            manifest = manifest[manifest["version"] <= version]
+        if when is not None:
+            when = pd.Timestamp(when)
+            when = when.tz_localize("UTC") if when.tzinfo is None else when.tz_convert("UTC")
+            manifest = manifest[manifest["created_at"] <= when]
+        if manifest.empty:
+            raise KeyError(f"No '{scheme}' snapshot at version={version}, when={when}")
+        return int(manifest["version"].max())
+
+    def as_of(self, scheme, version=None, when=None):
+        """Ranking of `scheme` as it stood at a point in time."""
+        snap = self._snapshot(self.resolve(scheme, version, when))
+        names = np.array(self.cities(), dtype=object)
+        return pd.DataFrame({
+            "city": names[snap["city"]],
+            "score": snap["score"],
+            "rank": snap["rank"],
+        }).sort_values("rank").reset_index(drop=True)
+
+    def history(self, city, scheme=None):
+        """Every recorded score and rank of one city ("Nashville, TN")."""
+        cities = self.cities()
+        if city not in cities:
+            return pd.DataFrame(columns=MANIFEST_COLUMNS + ["score", "rank"])
+        code = cities.index(city)
+        manifest = self.manifest()
+        version = self._update_index(int(manifest["version"].max()) if len(manifest) else 0)
+
+        # Only this city's slice of the memory-mapped index is read
+        if version == 0:
+            return pd.DataFrame(columns=MANIFEST_COLUMNS + ["score", "rank"])
+        offsets = np.load(self._index_path(version, "offsets"), mmap_mode="r")
+        rows = np.load(self._index_path(version, "rows"), mmap_mode="r")
+        # A city named by an interrupted record() has no indexed rows yet
+        block = rows[offsets[code]:offsets[code + 1]] if code + 1 < len(offsets) else rows[:0]
+        found = pd.DataFrame(np.array(block))
+        out = manifest.merge(found, on="version")
+        if scheme is not None:
+            out = out[out["scheme"] == scheme]
+        return out.sort_values("version").reset_index(drop=True)
+
+    def deltas(self, scheme, old, new):
+        """Rank and score changes between two snapshots (positive rank_delta = moved up)."""
+        old, new = self.resolve(scheme, old), self.resolve(scheme, new)
+        size = len(self.cities())
+
+        # Scatter both snapshots into dense city-indexed arrays, then diff once
+        dense = {}
+        for label, version in [("old", old), ("new", new)]:
+            snap = self._snapshot(version)
+            for col in ["score", "rank"]:
+                arr = np.full(size, np.nan)
+                arr[snap["city"]] = snap[col]
+                dense[f"{col}_{label}"] = arr
+        present = ~np.isnan(dense["rank_old"]) | ~np.isnan(dense["rank_new"])
+
+        out = pd.DataFrame({k: v[present] for k, v in dense.items()})
+        out.insert(0, "city", np.array(self.cities(), dtype=object)[present])
+        out["rank_delta"] = out["rank_old"] - out["rank_new"]
+        out["score_delta"] = out["score_new"] - out["score_old"]
+        return out.sort_values("rank_delta", key=np.abs, ascending=False, na_position="last").reset_index(drop=True)
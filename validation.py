@@ -0,0 +1,152 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Columns parsed as numbers once, here, instead of in every script
+NUMERIC = [
+    'leasedsf', 'rba', 'overall_rent', 'internal_class_rent', 'available_space',
+    'availability_proportion', 'direct_availability_proportion', 'sublet_availability_proportion',
+    'monthsigned', 'year',
+]
+REQUIRED = [
+    'city', 'state', 'internal_industry', 'leasedsf', 'rba', 'overall_rent', 'internal_class_rent',
+    'availability_proportion', 'sublet_availability_proportion',
+]
+PROPORTIONS = ['availability_proportion', 'direct_availability_proportion', 'sublet_availability_proportion']
+
+# Declarative rule set: (name, check, columns). Each rule owns one bit of
+# the per-row `violations` mask, in this order.
+RULES = (
+    [(f'missing:{c}', 'missing', [c]) for c in REQUIRED]
+    + [(f'non_numeric:{c}', 'non_numeric', [c]) for c in NUMERIC]
+    + [('zero_leasedsf', 'non_positive', ['leasedsf'])]
+    + [(f'out_of_range:{c}', 'outside_unit', [c]) for c in PROPORTIONS]
+    + [('leasedsf_gt_rba', 'greater_than', ['leasedsf', 'rba'])]
+)
+BITS = {name: np.uint64(1) << np.uint64(i) for i, (name, _, _) in enumerate(RULES)}
+
+# Bits mean nothing without the rule list that assigned them, so a saved
+# mask is stored with this fingerprint and only reused when it matches
+FINGERPRINT = hashlib.sha1(repr(RULES).encode()).hexdigest()[:12]
+
+
+def bits(*names):
+    """Combined bit mask for rule names; 'missing' expands to every missing:* rule, etc."""
+    mask = np.uint64(0)
+    for name in names:
+        matched = [rule for rule in BITS if rule == name or rule.split(':')[0] == name]
+        if not matched:
+            # A typo here would otherwise silently switch the filter off
+            raise KeyError(f"No validation rule named '{name}'")
+        for rule in matched:
+            mask |= BITS[rule]
+    return mask
+
+
+def passes(violations, *names):
+    """True for rows that violate none of the named rules."""
+    return (violations.to_numpy(dtype=np.uint64) & bits(*names)) == 0
+
+
+def summarize(violations):
+    """Rows breaking each rule, from a `violations` column."""
+    weights = np.array(list(BITS.values()), dtype=np.uint64)
+    hits = (violations.to_numpy(dtype=np.uint64)[:, None] & weights) != 0
+    return pd.Series(hits.sum(axis=0), index=list(BITS), name='rows')
+
+
+def select_valid(df, *names):
+    """Rows of `df` that pass the named rules, validating first if it has no mask yet."""
+    if 'violations' not in df.columns:
+        df, _ = validate(df)
+    return df[passes(df['violations'], *names)]
+
+
+def coerce(df):
+    """Normalize column names and parse NUMERIC columns; returns the frame and the raw numeric columns."""
+    df = df.rename(columns=lambda c: c.strip().lower().replace(' ', '_'))
+    raw = {c: df[c] for c in NUMERIC if c in df.columns}
+    for c, col in raw.items():
+        df[c] = pd.to_numeric(col, errors='coerce')
+    return df, raw
+
+
+def validate(df):
+    """Coerce numerics and evaluate every rule in one vectorized pass over `df`.
+
+    Returns the coerced frame with a uint64 `violations` column added and a
+    Series with the number of rows that broke each rule.
+    """
+    df, raw = coerce(df)
+
+    hits = np.zeros((len(df), len(RULES)), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        for i, (_, check, cols) in enumerate(RULES):
+            if not all(c in df.columns for c in cols):
+                continue
+            values = df[cols[0]]
+            if check == 'missing':
+                hits[:, i] = values.isna()
+                if not pd.api.types.is_numeric_dtype(values):
+                    hits[:, i] |= values.astype(str).str.strip() == ''
+            elif check == 'non_numeric':
+                hits[:, i] = values.isna().to_numpy() & raw[cols[0]].notna().to_numpy()
+            elif check == 'non_positive':
+                hits[:, i] = values.to_numpy() <= 0
+            elif check == 'outside_unit':
+                hits[:, i] = (values.to_numpy() < 0) | (values.to_numpy() > 1)
+            elif check == 'greater_than':
+                hits[:, i] = values.to_numpy() > df[cols[1]].to_numpy()
+
+    # Pack the rule columns into one integer per row
+    weights = np.array(list(BITS.values()), dtype=np.uint64)
+    df['violations'] = (hits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+    counts = pd.Series(hits.sum(axis=0), index=list(BITS), name='rows')
+    return df, counts
+
+
+def iter_validated(path, chunksize=100_000):
+    """Stream a CSV in chunks, validating each chunk as it is read."""
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield validate(chunk)
+
+
+def _rules_path(path):
+    return path + '.rules'
+
+
+def save_validated(df, path):
+    """Write a validated frame to CSV along with the fingerprint of the rules behind its mask."""
+    df.to_csv(path, index=False)
+    with open(_rules_path(path), 'w') as f:
+        f.write(FINGERPRINT + '\n')
+
+
+def load_validated(path, chunksize=100_000):
+    """Load a lease CSV with its `violations` mask.
+
+    A precomputed mask is reused only when the CSV was saved under the
+    current rule set; otherwise every row is validated again.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    saved = None
+    if os.path.exists(_rules_path(path)):
+        with open(_rules_path(path)) as f:
+            saved = f.read().strip()
+    if 'violations' in header and saved == FINGERPRINT:
+        df = pd.read_csv(path, dtype={'violations': np.uint64})
+        df, _ = coerce(df)
+        return df, summarize(df['violations'])
+    chunks, counts = [], None
+    for chunk, chunk_counts in iter_validated(path, chunksize):
+        chunks.append(chunk)
+        counts = chunk_counts if counts is None else counts + chunk_counts
+    return pd.concat(chunks, ignore_index=True), counts
+
+
+if __name__ == "__main__":
+    df, counts = load_validated("filtered_leases.csv")
+    print(f"{(df['violations'] != 0).sum()} of {len(df)} rows have at least one violation")
+    print(counts[counts > 0])